@@ -0,0 +1,16 @@
+"""
+Optional native build for the company detector.
+
+Set SHARED_SERVICES_USE_MYPYC=1 to compile the detector with mypyc; the
+pure-Python module is used whenever the compiled extension is not built.
+"""
+import os
+from setuptools import setup
+
+ext_modules = []
+if os.getenv("SHARED_SERVICES_USE_MYPYC") == "1":
+    from mypyc.build import mypycify
+
+    ext_modules = mypycify(["shared_services/company_detection/detector.py"])
+
+setup(ext_modules=ext_modules)
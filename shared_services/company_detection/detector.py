@@ -3,16 +3,164 @@ Company Detection Service
 Extracts company information from email addresses
 Ported from aiBA-1 CompanyDetectionService.ts to Python
 """
-from typing import Dict, Any, Optional, Set
+from typing import Dict, Any, Optional, FrozenSet, Iterable, Callable
 from dataclasses import dataclass
-from datetime import datetime
+from functools import lru_cache, _lru_cache_wrapper
 import re
+import sys
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Classification types, interned so results share one object per type
+_TYPE_CORPORATE = sys.intern('corporate')
+_TYPE_PERSONAL = sys.intern('personal')
+_TYPE_EDUCATIONAL = sys.intern('educational')
+_TYPE_GOVERNMENT = sys.intern('government')
+_TYPE_UNKNOWN = sys.intern('unknown')
 
-@dataclass
+# Pre-compiled patterns used on the detection path
+_EDU_STRIP_RE = re.compile(r'\.(edu|ac\.uk|ac\..+)$')
+_GOV_STRIP_RE = re.compile(r'\.(gov|mil)$')
+_WWW_PREFIX_RE = re.compile(r'^(www\.|mail\.|email\.)')
+_TLD_RE = re.compile(r'\.(com|org|net|co|io|ai|tech|inc)$')
+_CCTLD_RE = re.compile(r'\.(co\.uk|com\.au|co\.in)$')
+_DOMAIN_CHARS_RE = re.compile(r'[a-zA-Z0-9.-]+')
+_EMAIL_DOMAIN_RE = re.compile(r'@([a-zA-Z0-9.-]+)')
+
+# Domain suffixes identifying educational and government institutions
+_EDU_SUFFIXES = ('.edu', '.ac.uk')
+_GOV_SUFFIXES = ('.gov', '.mil')
+
+# Friendly names for personal email providers
+_PERSONAL_PROVIDER_NAMES: Dict[str, str] = {
+    'gmail.com': 'Gmail',
+    'yahoo.com': 'Yahoo',
+    'outlook.com': 'Outlook',
+    'hotmail.com': 'Hotmail',
+    'icloud.com': 'iCloud',
+    'aol.com': 'AOL'
+}
+
+# Known university names keyed on the lower-cased domain stem
+_UNIVERSITY_NAMES: Dict[str, str] = {
+    'stanford': 'Stanford University',
+    'mit': 'MIT',
+    'harvard': 'Harvard University',
+    'berkeley': 'UC Berkeley',
+    'oxford': 'Oxford University',
+    'cambridge': 'Cambridge University'
+}
+
+# Personal email providers
+_PERSONAL_PROVIDERS: FrozenSet[str] = frozenset({
+    'gmail.com', 'yahoo.com', 'outlook.com', 'hotmail.com', 'icloud.com',
+    'aol.com', 'protonmail.com', 'yandex.com', 'mail.ru', 'me.com',
+    'live.com', 'msn.com', 'yahoo.co.uk', 'yahoo.ca', 'yahoo.fr',
+    'googlemail.com', 'outlook.co.uk', 'btinternet.com', 'sky.com'
+})
+
+# Known corporate domains with their info
+_CORPORATE_INFO: Dict[str, Dict[str, str]] = {
+    'microsoft.com': {'name': 'Microsoft', 'industry': 'Technology'},
+    'apple.com': {'name': 'Apple', 'industry': 'Technology'},
+    'google.com': {'name': 'Google', 'industry': 'Technology'},
+    'amazon.com': {'name': 'Amazon', 'industry': 'Technology'},
+    'meta.com': {'name': 'Meta', 'industry': 'Technology'},
+    'facebook.com': {'name': 'Facebook', 'industry': 'Technology'},
+    'tesla.com': {'name': 'Tesla', 'industry': 'Automotive'},
+    'netflix.com': {'name': 'Netflix', 'industry': 'Entertainment'},
+    'salesforce.com': {'name': 'Salesforce', 'industry': 'Technology'},
+    'oracle.com': {'name': 'Oracle', 'industry': 'Technology'},
+    'ibm.com': {'name': 'IBM', 'industry': 'Technology'},
+    'adobe.com': {'name': 'Adobe', 'industry': 'Technology'},
+    'shopify.com': {'name': 'Shopify', 'industry': 'E-commerce'},
+    'stripe.com': {'name': 'Stripe', 'industry': 'Financial Services'},
+    'anthropic.com': {'name': 'Anthropic', 'industry': 'AI/Technology'},
+    'openai.com': {'name': 'OpenAI', 'industry': 'AI/Technology'}
+}
+
+# Domain trie terminal keys: a full-domain match, or any subdomain of the node
+_EXACT = object()
+_SUFFIX = object()
+
+# Domain keyword -> industry, checked in order (first match wins)
+_INDUSTRY_KEYWORDS = (
+    ('bank', 'Financial Services'),
+    ('finance', 'Financial Services'),
+    ('tech', 'Technology'),
+    ('ai', 'Technology'),
+    ('software', 'Technology'),
+    ('health', 'Healthcare'),
+    ('medical', 'Healthcare'),
+    ('pharma', 'Healthcare'),
+    ('consulting', 'Consulting'),
+    ('law', 'Legal Services'),
+    ('legal', 'Legal Services'),
+)
+# Rejects domains containing none of the industry keywords in one pass
+_INDUSTRY_ANY_RE = re.compile('|'.join(kw for kw, _ in _INDUSTRY_KEYWORDS))
+
+# Domain keyword -> government organization name, checked in order
+_GOV_KEYWORDS = (
+    ('nasa', 'NASA'),
+    ('state', 'US State Department'),
+    ('army', 'US Army'),
+    ('navy', 'US Navy'),
+    ('airforce', 'US Air Force'),
+)
+
+# Shared classification payloads stored at trie terminals
+_PERSONAL_PAYLOAD = {'type': _TYPE_PERSONAL}
+_EDUCATIONAL_PAYLOAD = {'type': _TYPE_EDUCATIONAL}
+_GOVERNMENT_PAYLOAD = {'type': _TYPE_GOVERNMENT}
+
+
+def _build_domain_trie() -> Dict[Any, Any]:
+    """Build a reverse-label trie classifying all known domains in one walk."""
+    trie: Dict[Any, Any] = {}
+    
+    def insert(domain: str, terminal: object, payload: Dict[str, str]) -> None:
+        node = trie
+        for label in reversed(domain.split('.')):
+            node = node.setdefault(label, {})
+        node[terminal] = payload
+    
+    for provider in _PERSONAL_PROVIDERS:
+        insert(provider, _EXACT, _PERSONAL_PAYLOAD)
+    for suffix in _EDU_SUFFIXES:
+        insert(suffix[1:], _SUFFIX, _EDUCATIONAL_PAYLOAD)
+    for suffix in _GOV_SUFFIXES:
+        insert(suffix[1:], _SUFFIX, _GOVERNMENT_PAYLOAD)
+    for corporate_domain, info in _CORPORATE_INFO.items():
+        insert(corporate_domain, _EXACT, {'type': _TYPE_CORPORATE, **info})
+    return trie
+
+
+_DOMAIN_TRIE = _build_domain_trie()
+
+
+@lru_cache(maxsize=2048)
+def _extract_company_from_domain(domain: str) -> Optional[str]:
+    """Extract company name from generic domain."""
+    # Single-label hosts and IP literals carry no company name
+    if '.' not in domain or domain.replace('.', '').isdigit():
+        return None
+    
+    # Remove common TLDs and subdomains
+    clean_domain = _WWW_PREFIX_RE.sub('', domain)
+    clean_domain = _TLD_RE.sub('', clean_domain)
+    clean_domain = _CCTLD_RE.sub('', clean_domain)
+    
+    if len(clean_domain) < 2:
+        return None
+    
+    # Capitalize first letter
+    return clean_domain[0].upper() + clean_domain[1:]
+
+
+@dataclass(slots=True)
 class CompanyDetectionResult:
     """Result of company detection from email."""
     company: Optional[str]
@@ -26,43 +174,56 @@ class CompanyDetectionResult:
 class CompanyDetectionService:
     """Service for detecting company information from email addresses."""
     
-    def __init__(self):
-        self.cache: Dict[str, CompanyDetectionResult] = {}
-        self.metrics = {
-            "total_detections": 0,
-            "cache_hits": 0,
-            "total_response_time": 0,
-            "cache_size": 0
-        }
+    def __init__(self) -> None:
+        # Per-instance LRU cache around the uncached detection path
+        self._detect_cached: _lru_cache_wrapper[CompanyDetectionResult] = (
+            lru_cache(maxsize=1000)(self._detect_uncached)
+        )
+        # Detections/hits from before the last clear_cache(); live counts come
+        # from the LRU cache statistics. Counters are ints and the timing total
+        # a float, so compiled (mypyc) and pure-Python builds report identical values
+        self._cleared_detections: int = 0
+        self._cleared_cache_hits: int = 0
+        self._total_response_time: float = 0.0
         
-        # Personal email providers
-        self.personal_providers: Set[str] = {
-            'gmail.com', 'yahoo.com', 'outlook.com', 'hotmail.com', 'icloud.com',
-            'aol.com', 'protonmail.com', 'yandex.com', 'mail.ru', 'me.com',
-            'live.com', 'msn.com', 'yahoo.co.uk', 'yahoo.ca', 'yahoo.fr',
-            'googlemail.com', 'outlook.co.uk', 'btinternet.com', 'sky.com'
-        }
+        # Shared, immutable domain tables (kept as attributes for compatibility)
+        self.personal_providers: FrozenSet[str] = _PERSONAL_PROVIDERS
+        self.corporate_info: Dict[str, Dict[str, str]] = _CORPORATE_INFO
+        self._trie: Dict[Any, Any] = _DOMAIN_TRIE
         
-        # Known corporate domains with their info
-        self.corporate_info: Dict[str, Dict[str, str]] = {
-            'microsoft.com': {'name': 'Microsoft', 'industry': 'Technology'},
-            'apple.com': {'name': 'Apple', 'industry': 'Technology'},
-            'google.com': {'name': 'Google', 'industry': 'Technology'},
-            'amazon.com': {'name': 'Amazon', 'industry': 'Technology'},
-            'meta.com': {'name': 'Meta', 'industry': 'Technology'},
-            'facebook.com': {'name': 'Facebook', 'industry': 'Technology'},
-            'tesla.com': {'name': 'Tesla', 'industry': 'Automotive'},
-            'netflix.com': {'name': 'Netflix', 'industry': 'Entertainment'},
-            'salesforce.com': {'name': 'Salesforce', 'industry': 'Technology'},
-            'oracle.com': {'name': 'Oracle', 'industry': 'Technology'},
-            'ibm.com': {'name': 'IBM', 'industry': 'Technology'},
-            'adobe.com': {'name': 'Adobe', 'industry': 'Technology'},
-            'shopify.com': {'name': 'Shopify', 'industry': 'E-commerce'},
-            'stripe.com': {'name': 'Stripe', 'industry': 'Financial Services'},
-            'anthropic.com': {'name': 'Anthropic', 'industry': 'AI/Technology'},
-            'openai.com': {'name': 'OpenAI', 'industry': 'AI/Technology'}
+        # Result builders keyed by classification type (None for unrecognized domains)
+        self._builders: Dict[Optional[str], Callable[..., CompanyDetectionResult]] = {
+            _TYPE_PERSONAL: self._build_personal,
+            _TYPE_EDUCATIONAL: self._build_educational,
+            _TYPE_GOVERNMENT: self._build_government,
+            _TYPE_CORPORATE: self._build_known_corporate,
+            None: self._build_generic,
         }
     
+    def _classify(self, domain: str) -> Optional[Dict[str, str]]:
+        """Classify a domain against the trie; the longest matching suffix wins."""
+        labels = domain.split('.')
+        node = self._trie
+        payload = None
+        remaining = len(labels)
+        for label in reversed(labels):
+            child = node.get(label)
+            if child is None:
+                break
+            node = child
+            remaining -= 1
+            payload = node.get(_SUFFIX if remaining else _EXACT, payload)
+        if payload is not None:
+            return payload
+        
+        # Institutional labels in the middle of a domain (e.g. foo.edu.au, foo.gov.uk)
+        inner_labels = labels[1:-1]
+        if 'edu' in inner_labels or 'ac' in inner_labels:
+            return _EDUCATIONAL_PAYLOAD
+        if 'gov' in inner_labels:
+            return _GOVERNMENT_PAYLOAD
+        return None
+    
     def detect_from_email(self, email: str) -> CompanyDetectionResult:
         """
         Detect company information from an email address.
@@ -73,195 +234,173 @@ class CompanyDetectionService:
         Returns:
             CompanyDetectionResult with detection information
         """
-        start_time = datetime.now()
+        return self._detect_cached(email)
+    
+    def detect_from_emails(self, emails: Iterable[str]) -> Dict[str, CompanyDetectionResult]:
+        """
+        Detect company information for many email addresses at once.
+        
+        Duplicate addresses are collapsed before detection, so metrics count
+        one detection per unique address rather than one per input.
         
-        # Check cache first
-        if email in self.cache:
-            self.metrics["cache_hits"] += 1
-            self.metrics["total_detections"] += 1
-            return self.cache[email]
+        Args:
+            emails: Email addresses to analyze
+            
+        Returns:
+            Dict mapping each unique email to its CompanyDetectionResult,
+            in first-seen order
+        """
+        detect = self._detect_cached
+        return {email: detect(email) for email in dict.fromkeys(emails)}
+    
+    def _detect_uncached(self, email: str) -> CompanyDetectionResult:
+        """Run detection for an email address, bypassing the cache."""
+        start_ns = time.perf_counter_ns()
         
-        # Extract domain
-        domain_match = re.search(r'@([a-zA-Z0-9.-]+)', email)
-        if not domain_match:
+        # Extract domain: the common well-formed case is everything after the
+        # first '@'; anything else (display names, brackets, whitespace)
+        # takes the first run of domain characters following an '@'
+        _, sep, domain = email.partition('@')
+        if not (sep and _DOMAIN_CHARS_RE.fullmatch(domain)):
+            domain_match = _EMAIL_DOMAIN_RE.search(email)
+            domain = domain_match.group(1) if domain_match else ''
+        domain = domain.lower()
+        if not domain:
             result = CompanyDetectionResult(
                 company=None,
-                type='unknown',
+                type=_TYPE_UNKNOWN,
                 confidence=0,
                 website=None
             )
-            return self._cache_result(email, result, start_time)
-        
-        domain = domain_match.group(1).lower()
-        
-        # Check for personal providers
-        if domain in self.personal_providers:
-            result = CompanyDetectionResult(
-                company=self._get_personal_provider_name(domain),
-                type='personal',
-                confidence=1.0,
-                website=None,  # Personal emails don't have company websites
-                metadata={'provider': domain}
-            )
-            return self._cache_result(email, result, start_time)
+        else:
+            payload = self._classify(domain)
+            kind = payload['type'] if payload else None
+            result = self._builders[kind](domain, payload)
         
-        # Check for educational institutions
-        if domain.endswith('.edu') or '.edu.' in domain or \
-           domain.endswith('.ac.uk') or '.ac.' in domain:
-            result = CompanyDetectionResult(
-                company=self._extract_university_name(domain),
-                type='educational',
-                confidence=0.9,
-                industry='Education',
-                website=domain  # Educational domain is their website
-            )
-            return self._cache_result(email, result, start_time)
-        
-        # Check for government domains
-        if domain.endswith('.gov') or domain.endswith('.mil') or '.gov.' in domain:
-            result = CompanyDetectionResult(
-                company=self._extract_government_name(domain),
-                type='government',
-                confidence=0.9,
-                industry='Government',
-                website=domain  # Government domain is their website
-            )
-            return self._cache_result(email, result, start_time)
-        
-        # Check known corporate domains
-        if domain in self.corporate_info:
-            info = self.corporate_info[domain]
-            result = CompanyDetectionResult(
-                company=info['name'],
-                type='corporate',
-                confidence=0.8,
-                industry=info.get('industry'),
-                website=domain  # Corporate domain is their website
-            )
-            return self._cache_result(email, result, start_time)
-        
-        # Try to extract company name from domain
-        extracted_name = self._extract_company_from_domain(domain)
-        result = CompanyDetectionResult(
+        return self._record_metrics(result, start_ns)
+    
+    def _build_personal(self, domain: str, payload: Dict[str, str]) -> CompanyDetectionResult:
+        """Build the result for a personal email provider."""
+        return CompanyDetectionResult(
+            company=self._get_personal_provider_name(domain),
+            type=_TYPE_PERSONAL,
+            confidence=1.0,
+            website=None,  # Personal emails don't have company websites
+            metadata={'provider': domain}
+        )
+    
+    def _build_educational(self, domain: str, payload: Dict[str, str]) -> CompanyDetectionResult:
+        """Build the result for an educational institution."""
+        return CompanyDetectionResult(
+            company=self._extract_university_name(domain),
+            type=_TYPE_EDUCATIONAL,
+            confidence=0.9,
+            industry='Education',
+            website=domain  # Educational domain is their website
+        )
+    
+    def _build_government(self, domain: str, payload: Dict[str, str]) -> CompanyDetectionResult:
+        """Build the result for a government domain."""
+        return CompanyDetectionResult(
+            company=self._extract_government_name(domain),
+            type=_TYPE_GOVERNMENT,
+            confidence=0.9,
+            industry='Government',
+            website=domain  # Government domain is their website
+        )
+    
+    def _build_known_corporate(self, domain: str, payload: Dict[str, str]) -> CompanyDetectionResult:
+        """Build the result for a known corporate domain."""
+        return CompanyDetectionResult(
+            company=payload['name'],
+            type=_TYPE_CORPORATE,
+            confidence=0.8,
+            industry=payload.get('industry'),
+            website=domain  # Corporate domain is their website
+        )
+    
+    def _build_generic(self, domain: str, payload: None) -> CompanyDetectionResult:
+        """Build the result for an unrecognized domain by extracting a company name."""
+        extracted_name = _extract_company_from_domain(domain)
+        return CompanyDetectionResult(
             company=extracted_name,
-            type='corporate',
+            type=_TYPE_CORPORATE,
             confidence=0.6 if extracted_name else 0.2,
             industry=self._infer_industry(domain),
             website=domain if extracted_name else None  # Only set website if we extracted a company
         )
-        
-        return self._cache_result(email, result, start_time)
     
     def _get_personal_provider_name(self, domain: str) -> str:
         """Get friendly name for personal email provider."""
-        providers = {
-            'gmail.com': 'Gmail',
-            'yahoo.com': 'Yahoo',
-            'outlook.com': 'Outlook',
-            'hotmail.com': 'Hotmail',
-            'icloud.com': 'iCloud',
-            'aol.com': 'AOL'
-        }
-        return providers.get(domain, domain)
+        return _PERSONAL_PROVIDER_NAMES.get(domain, domain)
     
     def _extract_university_name(self, domain: str) -> str:
         """Extract university name from educational domain."""
         # Remove .edu, .ac.uk etc and format
-        name = re.sub(r'\.(edu|ac\.uk|ac\..+)$', '', domain)
+        name = _EDU_STRIP_RE.sub('', domain)
         name = name.replace('.', ' ')
-        name = ' '.join(word.capitalize() for word in name.split())
         
-        # Known mappings
-        mappings = {
-            'stanford': 'Stanford University',
-            'mit': 'MIT',
-            'harvard': 'Harvard University',
-            'berkeley': 'UC Berkeley',
-            'oxford': 'Oxford University',
-            'cambridge': 'Cambridge University'
-        }
+        # Domain is already lower-cased, so known names match before formatting
+        if name in _UNIVERSITY_NAMES:
+            return _UNIVERSITY_NAMES[name]
         
-        return mappings.get(name.lower(), f"{name} University")
+        return f"{name.title()} University"
     
     def _extract_government_name(self, domain: str) -> str:
         """Extract government organization name from domain."""
-        if 'nasa' in domain:
-            return 'NASA'
-        if 'state' in domain:
-            return 'US State Department'
-        if 'army' in domain:
-            return 'US Army'
-        if 'navy' in domain:
-            return 'US Navy'
-        if 'airforce' in domain:
-            return 'US Air Force'
+        for keyword, name in _GOV_KEYWORDS:
+            if keyword in domain:
+                return name
         
         # Generic extraction
-        name = re.sub(r'\.(gov|mil)$', '', domain)
+        name = _GOV_STRIP_RE.sub('', domain)
         name = name.replace('.', ' ').upper()
         return name
     
-    def _extract_company_from_domain(self, domain: str) -> Optional[str]:
-        """Extract company name from generic domain."""
-        # Remove common TLDs and subdomains
-        clean_domain = re.sub(r'^(www\.|mail\.|email\.)', '', domain)
-        clean_domain = re.sub(r'\.(com|org|net|co|io|ai|tech|inc)$', '', clean_domain)
-        clean_domain = re.sub(r'\.(co\.uk|com\.au|co\.in)$', '', clean_domain)
-        
-        if len(clean_domain) < 2:
-            return None
-        
-        # Capitalize first letter
-        return clean_domain[0].upper() + clean_domain[1:]
-    
     def _infer_industry(self, domain: str) -> Optional[str]:
         """Infer industry from domain keywords."""
-        if 'bank' in domain or 'finance' in domain:
-            return 'Financial Services'
-        if 'tech' in domain or 'ai' in domain or 'software' in domain:
-            return 'Technology'
-        if 'health' in domain or 'medical' in domain or 'pharma' in domain:
-            return 'Healthcare'
-        if 'consulting' in domain:
-            return 'Consulting'
-        if 'law' in domain or 'legal' in domain:
-            return 'Legal Services'
+        if not _INDUSTRY_ANY_RE.search(domain):
+            return None
+        for keyword, industry in _INDUSTRY_KEYWORDS:
+            if keyword in domain:
+                return industry
         return None
     
-    def _cache_result(
+    def _record_metrics(
         self, 
-        email: str, 
         result: CompanyDetectionResult, 
-        start_time: datetime
+        start_ns: int
     ) -> CompanyDetectionResult:
-        """Cache the detection result with metrics tracking."""
-        response_time = (datetime.now() - start_time).total_seconds() * 1000
-        
-        # Update metrics
-        self.metrics["total_detections"] += 1
-        self.metrics["total_response_time"] += response_time
-        self.metrics["cache_size"] = len(self.cache)
-        
-        # Cache with LRU-like behavior (simple size limit)
-        if len(self.cache) > 1000:
-            # Remove oldest entry
-            first_key = next(iter(self.cache))
-            del self.cache[first_key]
-        
-        self.cache[email] = result
+        """Record response time for an uncached detection."""
+        response_time = (time.perf_counter_ns() - start_ns) / 1_000_000
+        self._total_response_time += response_time
         return result
     
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Running detection totals (total_detections, cache_hits, total_response_time in ms)."""
+        cache_info = self._detect_cached.cache_info()
+        return {
+            "total_detections": (
+                self._cleared_detections + cache_info.hits + cache_info.misses
+            ),
+            "cache_hits": self._cleared_cache_hits + cache_info.hits,
+            "total_response_time": self._total_response_time
+        }
+    
     def get_health(self) -> Dict[str, Any]:
         """Get service health metrics."""
+        metrics = self.metrics
+        total_detections = metrics["total_detections"]
         return {
             "status": "healthy",
             "metrics": {
-                "cache_size": len(self.cache),
-                "total_detections": self.metrics["total_detections"],
-                "cache_hits": self.metrics["cache_hits"],
+                "cache_size": self._detect_cached.cache_info().currsize,
+                "total_detections": total_detections,
+                "cache_hits": metrics["cache_hits"],
                 "average_response_time": (
-                    self.metrics["total_response_time"] / self.metrics["total_detections"]
-                    if self.metrics["total_detections"] > 0
+                    self._total_response_time / total_detections
+                    if total_detections > 0
                     else 0
                 )
             }
@@ -269,8 +408,11 @@ class CompanyDetectionService:
     
     def clear_cache(self) -> None:
         """Clear the detection cache."""
-        self.cache.clear()
-        self.metrics["cache_size"] = 0
+        # cache_clear() also resets hit/miss statistics, so fold them in first
+        cache_info = self._detect_cached.cache_info()
+        self._cleared_detections += cache_info.hits + cache_info.misses
+        self._cleared_cache_hits += cache_info.hits
+        self._detect_cached.cache_clear()
 
 
 # Global instance
@@ -4,163 +4,138 @@ Centralized HTML email templates for consistency
 """
 from typing import Optional, Dict, Any
 from dataclasses import dataclass
+from html import escape
 
-@dataclass
-class EmailTemplate:
-    """Email template data"""
-    subject: str
-    html: str
-    text: str
+# Base email skeleton, built once at import; get_base_html() joins the body between these
+_BASE_HTML_PREFIX = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <style>
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
+            line-height: 1.6;
+            color: #333;
+            background-color: #f5f5f5;
+            margin: 0;
+            padding: 0;
+        }
+        .email-wrapper {
+            background-color: #f5f5f5;
+            padding: 20px;
+        }
+        .email-container {
+            max-width: 600px;
+            margin: 0 auto;
+            background-color: white;
+            border-radius: 8px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+            overflow: hidden;
+        }
+        .email-header {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            padding: 30px;
+            text-align: center;
+        }
+        .email-header h1 {
+            color: white;
+            margin: 0;
+            font-size: 28px;
+        }
+        .email-content {
+            padding: 30px;
+        }
+        .button {
+            display: inline-block;
+            padding: 14px 28px;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            text-decoration: none;
+            border-radius: 6px;
+            font-weight: 600;
+            margin: 20px 0;
+        }
+        .button:hover {
+            opacity: 0.9;
+        }
+        .email-footer {
+            padding: 20px 30px;
+            background-color: #f9fafb;
+            border-top: 1px solid #e5e7eb;
+            font-size: 14px;
+            color: #6b7280;
+        }
+        .divider {
+            height: 1px;
+            background-color: #e5e7eb;
+            margin: 20px 0;
+        }
+        .badge {
+            display: inline-block;
+            padding: 4px 12px;
+            background-color: #e0e7ff;
+            color: #3730a3;
+            border-radius: 4px;
+            font-size: 14px;
+            font-weight: 600;
+        }
+        .success-badge {
+            background-color: #d1fae5;
+            color: #065f46;
+        }
+        .warning-badge {
+            background-color: #fed7aa;
+            color: #92400e;
+        }
+        .info-box {
+            background-color: #f0f9ff;
+            border-left: 4px solid #3b82f6;
+            padding: 15px;
+            margin: 20px 0;
+        }
+    </style>
+</head>
+<body>
+    <div class="email-wrapper">
+        <div class="email-container">
+            """
 
-class EmailTemplates:
-    """
-    Centralized email templates for all projects.
-    """
-    
-    @staticmethod
-    def get_base_html(content: str, footer: Optional[str] = None) -> str:
-        """
-        Get base HTML template with consistent styling.
-        
-        Args:
-            content: Main content HTML
-            footer: Optional footer HTML
-            
-        Returns:
-            Complete HTML email
-        """
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                body {{
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    background-color: #f5f5f5;
-                    margin: 0;
-                    padding: 0;
-                }}
-                .email-wrapper {{
-                    background-color: #f5f5f5;
-                    padding: 20px;
-                }}
-                .email-container {{
-                    max-width: 600px;
-                    margin: 0 auto;
-                    background-color: white;
-                    border-radius: 8px;
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                    overflow: hidden;
-                }}
-                .email-header {{
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    padding: 30px;
-                    text-align: center;
-                }}
-                .email-header h1 {{
-                    color: white;
-                    margin: 0;
-                    font-size: 28px;
-                }}
-                .email-content {{
-                    padding: 30px;
-                }}
-                .button {{
-                    display: inline-block;
-                    padding: 14px 28px;
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    text-decoration: none;
-                    border-radius: 6px;
-                    font-weight: 600;
-                    margin: 20px 0;
-                }}
-                .button:hover {{
-                    opacity: 0.9;
-                }}
-                .email-footer {{
-                    padding: 20px 30px;
-                    background-color: #f9fafb;
-                    border-top: 1px solid #e5e7eb;
-                    font-size: 14px;
-                    color: #6b7280;
-                }}
-                .divider {{
-                    height: 1px;
-                    background-color: #e5e7eb;
-                    margin: 20px 0;
-                }}
-                .badge {{
-                    display: inline-block;
-                    padding: 4px 12px;
-                    background-color: #e0e7ff;
-                    color: #3730a3;
-                    border-radius: 4px;
-                    font-size: 14px;
-                    font-weight: 600;
-                }}
-                .success-badge {{
-                    background-color: #d1fae5;
-                    color: #065f46;
-                }}
-                .warning-badge {{
-                    background-color: #fed7aa;
-                    color: #92400e;
-                }}
-                .info-box {{
-                    background-color: #f0f9ff;
-                    border-left: 4px solid #3b82f6;
-                    padding: 15px;
-                    margin: 20px 0;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="email-wrapper">
-                <div class="email-container">
-                    {content}
-                    {f'<div class="email-footer">{footer}</div>' if footer else ''}
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-    
-    @staticmethod
-    def aiden_questionnaire_complete(
-        name: str,
-        questions_answered: int = 33,
-        insights_url: Optional[str] = None
-    ) -> EmailTemplate:
-        """
-        AIDEN 33-question questionnaire completion email.
-        
-        Args:
-            name: User's name
-            questions_answered: Number of questions completed
-            insights_url: Optional URL to view insights
-            
-        Returns:
-            EmailTemplate
-        """
-        content = f"""
+_FOOTER_FMT = '\n            <div class="email-footer">{}</div>'
+
+_BASE_HTML_SUFFIX = """
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+# Shared layout as a %-format template: literal '%' in the CSS is doubled so
+# each email below can bake its content and footer into one string at import
+_BASE_HTML_PREFIX_FMT = _BASE_HTML_PREFIX.replace("%", "%%")
+
+
+def _compile_layout(content_fmt: str, footer: str) -> str:
+    """Wrap a %-format content template and static footer in the base layout."""
+    return _BASE_HTML_PREFIX_FMT + content_fmt + _FOOTER_FMT.format(footer) + _BASE_HTML_SUFFIX
+
+
+_AIDEN_COMPLETE_SUBJECT = "🎉 Your AIDEN AI Assistant Profile is Ready!"
+
+_AIDEN_COMPLETE_HTML = _compile_layout("""
         <div class="email-header">
             <h1>AIDEN Assessment Complete!</h1>
         </div>
         <div class="email-content">
-            <h2>Congratulations, {name}! 🎊</h2>
-            <p>You've successfully completed all <span class="success-badge">{questions_answered} questions</span> in your AIDEN Personal AI Assistant assessment.</p>
+            <h2>Congratulations, %s! 🎊</h2>
+            <p>You've successfully completed all <span class="success-badge">%s questions</span> in your AIDEN Personal AI Assistant assessment.</p>
             
             <div class="info-box">
                 <strong>Your AI Assistant Profile is Ready!</strong><br>
                 Based on your responses, we've created a personalized AI assistant configuration tailored to your specific needs and preferences.
             </div>
             
-            {"<center><a href='" + insights_url + "' class='button'>View Your AI Profile</a></center>" if insights_url else ""}
+            %s
             
             <h3>What We've Learned About You:</h3>
             <ul>
@@ -181,26 +156,22 @@ class EmailTemplates:
             
             <p>Your journey to enhanced productivity with AI starts now!</p>
         </div>
-        """
-        
-        footer = """
+        """, """
         <p><strong>Need Help?</strong> Our team is here to assist you in getting the most from your AI assistant.</p>
         <p style="font-size: 12px;">This assessment was powered by AIDEN - Your Personal AI Assistant Factory</p>
-        """
-        
-        html = EmailTemplates.get_base_html(content, footer)
-        
-        text = f"""
+        """)
+
+_AIDEN_COMPLETE_TEXT = """
         AIDEN Assessment Complete!
         
-        Congratulations, {name}!
+        Congratulations, %s!
         
-        You've successfully completed all {questions_answered} questions in your AIDEN Personal AI Assistant assessment.
+        You've successfully completed all %s questions in your AIDEN Personal AI Assistant assessment.
         
         Your AI Assistant Profile is Ready!
         Based on your responses, we've created a personalized AI assistant configuration tailored to your specific needs and preferences.
         
-        {"View Your AI Profile: " + insights_url if insights_url else ""}
+        %s
         
         What We've Learned About You:
         - Your work style and preferences
@@ -219,43 +190,21 @@ class EmailTemplates:
         
         This assessment was powered by AIDEN - Your Personal AI Assistant Factory
         """
-        
-        return EmailTemplate(
-            subject="🎉 Your AIDEN AI Assistant Profile is Ready!",
-            html=html,
-            text=text
-        )
-    
-    @staticmethod
-    def aiba_assessment_complete(
-        name: str,
-        company: Optional[str] = None,
-        score: Optional[int] = None,
-        report_url: Optional[str] = None
-    ) -> EmailTemplate:
-        """
-        aiBA-1.2 AI assessment completion email.
-        
-        Args:
-            name: User's name
-            company: Optional company name
-            score: Optional assessment score
-            report_url: Optional URL to view report
-            
-        Returns:
-            EmailTemplate
-        """
-        content = f"""
+
+_AIDEN_INSIGHTS_HTML = "<center><a href='%s' class='button'>View Your AI Profile</a></center>"
+_AIDEN_INSIGHTS_TEXT = "View Your AI Profile: %s"
+
+_AIBA_COMPLETE_HTML = _compile_layout("""
         <div class="email-header">
             <h1>AI Business Assessment Complete</h1>
         </div>
         <div class="email-content">
-            <h2>Great job, {name}! 🏆</h2>
-            {"<p>Your organization at <strong>" + company + "</strong> has completed the AI Business Assessment.</p>" if company else "<p>You've completed the AI Business Assessment.</p>"}
+            <h2>Great job, %s! 🏆</h2>
+            %s
             
-            {f'<div class="info-box"><strong>Your AI Readiness Score: {score}/100</strong><br>This score reflects your current position in the AI adoption journey.</div>' if score else ''}
+            %s
             
-            {"<center><a href='" + report_url + "' class='button'>Download Your Report</a></center>" if report_url else ""}
+            %s
             
             <h3>Your Assessment Covers:</h3>
             <ul>
@@ -276,25 +225,21 @@ class EmailTemplates:
                 <li>Resources and best practices</li>
             </ul>
         </div>
-        """
-        
-        footer = """
+        """, """
         <p><strong>Questions?</strong> Reply to this email to connect with our AI consulting team.</p>
         <p style="font-size: 12px;">AI Business Assessment v1.2 - Confidential</p>
-        """
-        
-        html = EmailTemplates.get_base_html(content, footer)
-        
-        text = f"""
+        """)
+
+_AIBA_COMPLETE_TEXT = """
         AI Business Assessment Complete
         
-        Great job, {name}!
+        Great job, %s!
         
-        {"Your organization at " + company + " has completed the AI Business Assessment." if company else "You've completed the AI Business Assessment."}
+        %s
         
-        {f'Your AI Readiness Score: {score}/100' if score else ''}
+        %s
         
-        {"Download Your Report: " + report_url if report_url else ""}
+        %s
         
         Your Assessment Covers:
         - Current AI implementation status
@@ -313,9 +258,116 @@ class EmailTemplates:
         
         AI Business Assessment v1.2 - Confidential
         """
+
+_AIBA_COMPANY_HTML = "<p>Your organization at <strong>%s</strong> has completed the AI Business Assessment.</p>"
+_AIBA_NO_COMPANY_HTML = "<p>You've completed the AI Business Assessment.</p>"
+_AIBA_COMPANY_TEXT = "Your organization at %s has completed the AI Business Assessment."
+_AIBA_NO_COMPANY_TEXT = "You've completed the AI Business Assessment."
+_AIBA_SCORE_HTML = '<div class="info-box"><strong>Your AI Readiness Score: %s/100</strong><br>This score reflects your current position in the AI adoption journey.</div>'
+_AIBA_SCORE_TEXT = "Your AI Readiness Score: %s/100"
+_AIBA_REPORT_HTML = "<center><a href='%s' class='button'>Download Your Report</a></center>"
+_AIBA_REPORT_TEXT = "Download Your Report: %s"
+
+@dataclass(slots=True)
+class EmailTemplate:
+    """Email template data"""
+    subject: str
+    html: str
+    text: str
+
+class EmailTemplates:
+    """
+    Centralized email templates for all projects.
+    """
+    
+    @staticmethod
+    def get_base_html(content: str, footer: Optional[str] = None) -> str:
+        """
+        Get base HTML template with consistent styling.
+        
+        Args:
+            content: Main content HTML
+            footer: Optional footer HTML
+            
+        Returns:
+            Complete HTML email
+        """
+        return (
+            _BASE_HTML_PREFIX
+            + content
+            + (_FOOTER_FMT.format(footer) if footer else '')
+            + _BASE_HTML_SUFFIX
+        )
+    
+    @staticmethod
+    def aiden_questionnaire_complete(
+        name: str,
+        questions_answered: int = 33,
+        insights_url: Optional[str] = None
+    ) -> EmailTemplate:
+        """
+        AIDEN 33-question questionnaire completion email.
+        
+        Args:
+            name: User's name
+            questions_answered: Number of questions completed
+            insights_url: Optional URL to view insights
+            
+        Returns:
+            EmailTemplate
+        """
+        if insights_url:
+            insights_html = _AIDEN_INSIGHTS_HTML % escape(insights_url, quote=True)
+            insights_text = _AIDEN_INSIGHTS_TEXT % insights_url
+        else:
+            insights_html = insights_text = ""
+        
+        return EmailTemplate(
+            subject=_AIDEN_COMPLETE_SUBJECT,
+            html=_AIDEN_COMPLETE_HTML % (escape(name), questions_answered, insights_html),
+            text=_AIDEN_COMPLETE_TEXT % (name, questions_answered, insights_text)
+        )
+    
+    @staticmethod
+    def aiba_assessment_complete(
+        name: str,
+        company: Optional[str] = None,
+        score: Optional[int] = None,
+        report_url: Optional[str] = None
+    ) -> EmailTemplate:
+        """
+        aiBA-1.2 AI assessment completion email.
+        
+        Args:
+            name: User's name
+            company: Optional company name
+            score: Optional assessment score
+            report_url: Optional URL to view report
+            
+        Returns:
+            EmailTemplate
+        """
+        if company:
+            company_html = _AIBA_COMPANY_HTML % escape(company)
+            company_text = _AIBA_COMPANY_TEXT % company
+        else:
+            company_html = _AIBA_NO_COMPANY_HTML
+            company_text = _AIBA_NO_COMPANY_TEXT
+        
+        if score:
+            score_html = _AIBA_SCORE_HTML % score
+            score_text = _AIBA_SCORE_TEXT % score
+        else:
+            score_html = score_text = ""
+        
+        if report_url:
+            report_html = _AIBA_REPORT_HTML % escape(report_url, quote=True)
+            report_text = _AIBA_REPORT_TEXT % report_url
+        else:
+            report_html = report_text = ""
         
         return EmailTemplate(
             subject=f"Your AI Business Assessment Results {('- ' + company) if company else ''}",
-            html=html,
-            text=text
+            html=_AIBA_COMPLETE_HTML % (escape(name), company_html, score_html, report_html),
+            text=_AIBA_COMPLETE_TEXT % (name, company_text, score_text, report_text)
         )
\ No newline at end of file
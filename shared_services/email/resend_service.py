@@ -3,19 +3,251 @@ Resend Email Service
 Handles transactional emails across all projects
 """
 import os
+import asyncio
+import base64
+from hashlib import blake2b
+from html import escape
 import logging
-from typing import Optional, List, Dict, Any
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+import threading
+import time
+from typing import Optional, List, Dict, Any, BinaryIO, Mapping, Tuple
+from dataclasses import dataclass, replace
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import resend
+from resend.exceptions import (
+    ResendError,
+    MissingApiKeyError,
+    InvalidApiKeyError,
+    ValidationError,
+    MissingRequiredFieldsError,
+)
+
+try:
+    from resend.exceptions import NoContentError
+except ImportError:  # older SDKs do not raise it
+    NoContentError = ResendError
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "speedups" extra
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Environment configuration, read once at import
+_RESEND_API_KEY = os.getenv('RESEND_API_KEY')
+_RESEND_FROM = os.getenv('RESEND_FROM_EMAIL', 'admin@stablemischief.ai')
+
+# Errors meaning no further request with the current API key can succeed
+_AUTH_ERRORS = (MissingApiKeyError, InvalidApiKeyError)
+
+# Errors a send can fail with. Newer SDKs wrap HTTP client failures in
+# ResendError, older ones (resend 0.x) let requests exceptions through;
+# NoContentError (empty API response) is not a ResendError
+_SEND_ERRORS = (ResendError, NoContentError, requests.RequestException)
+
+# Batch rejections caused by an individual email's content; only these are
+# worth retrying one email at a time (rate limits and server errors are not)
+_BATCH_VALIDATION_ERRORS = (ValidationError, MissingRequiredFieldsError)
+
+# Queued sends retry rate-limit, server and transport failures with backoff
+_QUEUE_MAX_ATTEMPTS = 3
+_QUEUE_RETRY_BACKOFF = 1.0  # seconds, doubled after each failed attempt
+
+# Maximum number of emails Resend accepts per batch request
+_BATCH_SIZE = 100
+
+# Connections kept alive to the Resend API, shared by all ResendService instances
+_HTTP_POOL_SIZE = 32
+_HTTP_TIMEOUT = 30
+
+# Attachment stream read size; a multiple of 3 so full reads encode without carry-over
+_ATTACHMENT_CHUNK_SIZE = 48 * 1024
+
+# Stylesheet fragments shared by the transactional email layouts
+_COMMON_CSS = """
+        body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .footer { margin-top: 40px; color: #6b7280; font-size: 14px; }
+"""
+
+_BUTTON_CSS_FMT = """
+        .button {
+            display: inline-block;
+            padding: 12px 24px;
+            background-color: %s;
+            color: white;
+            text-decoration: none;
+            border-radius: 6px;
+            font-weight: 500;
+        }
+"""
+_BUTTON_BLUE_CSS = _BUTTON_CSS_FMT % "#3b82f6"
+_BUTTON_GREEN_CSS = _BUTTON_CSS_FMT % "#10b981"
+
+_SUCCESS_BADGE_CSS = """
+        .success-badge {
+            display: inline-block;
+            padding: 4px 8px;
+            background-color: #d1fae5;
+            color: #065f46;
+            border-radius: 4px;
+            font-size: 12px;
+            font-weight: 600;
+        }
+"""
+
+_MAGIC_HEAD = "".join((
+    "\n<!DOCTYPE html>\n<html>\n<head>\n    <style>",
+    _COMMON_CSS,
+    _BUTTON_BLUE_CSS,
+    "    </style>\n</head>\n",
+))
+_COMPLETION_HEAD = "".join((
+    "\n<!DOCTYPE html>\n<html>\n<head>\n    <style>",
+    _COMMON_CSS,
+    _BUTTON_GREEN_CSS,
+    _SUCCESS_BADGE_CSS,
+    "    </style>\n</head>\n",
+))
+
+# Email bodies are built once at import and filled per send with a single % pass;
+# HTML substitutions must be escaped by the caller
+_MAGIC_LINK_HTML = _MAGIC_HEAD + """<body>
+    <div class="container">
+        <h2>Hello %s!</h2>
+        %s
+        <p>Click the button below to securely log in to your account:</p>
+        <p style="margin: 30px 0;">
+            <a href="%s" class="button">Log In to AIDEN</a>
+        </p>
+        <p>Or copy and paste this link in your browser:</p>
+        <p style="word-break: break-all; color: #3b82f6;">%s</p>
+        <div class="footer">
+            <p>This link will expire in 15 minutes for security reasons.</p>
+            <p>If you didn't request this email, you can safely ignore it.</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+_MAGIC_LINK_TEXT = """
+Hello %s!
+
+%s
+
+Click this link to securely log in to your account:
+%s
+
+This link will expire in 15 minutes for security reasons.
+If you didn't request this email, you can safely ignore it.
+"""
+
+_MAGIC_LINK_SUBJECT = "Your secure login link"
+_MAGIC_LINK_TAGS = {"type": "magic_link", "app": "aiden"}
+
+_WELCOME_HTML_WITH_COMPANY = "<p>Welcome to AIDEN from %s.</p>"
+_WELCOME_HTML_NO_COMPANY = "<p>Welcome to AIDEN.</p>"
+_WELCOME_TEXT_WITH_COMPANY = "Welcome to AIDEN from %s."
+_WELCOME_TEXT_NO_COMPANY = "Welcome to AIDEN."
+
+_COMPLETION_HTML = _COMPLETION_HEAD + """<body>
+    <div class="container">
+        <h2>Congratulations, %s! 🎉</h2>
+        <p>You've successfully completed your <span class="success-badge">%s</span></p>
+        
+        %s
+        
+        <h3>What's Next?</h3>
+        <ul>
+            <li>Review your personalized insights</li>
+            <li>Share results with your team</li>
+            <li>Schedule a follow-up consultation</li>
+        </ul>
+        
+        <div class="footer">
+            <p>Thank you for using our platform. If you have any questions, please don't hesitate to reach out.</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+_COMPLETION_TEXT = """
+Congratulations, %s!
+
+You've successfully completed your %s.
+
+%s
+
+What's Next?
+- Review your personalized insights
+- Share results with your team
+- Schedule a follow-up consultation
+
+Thank you for using our platform. If you have any questions, please don't hesitate to reach out.
+"""
+
+_RESULTS_HTML_WITH_URL = (
+    "<p>Your personalized results are ready. Click the button below to view them:</p>"
+    "<p style='margin: 30px 0;'><a href='%s' class='button'>View Your Results</a></p>"
+)
+_RESULTS_HTML_ATTACHED = "<p>Your results report is attached to this email.</p>"
+_RESULTS_TEXT_WITH_URL = "Your personalized results are ready. View them here: %s"
+_RESULTS_TEXT_ATTACHED = "Your results report is attached to this email."
+
 @dataclass
 class EmailAttachment:
-    """Email attachment data"""
+    """
+    Email attachment data.
+    
+    Use content for small in-memory payloads. For large files, pass an open
+    binary stream as content_stream instead; it is base64-encoded in chunks
+    so the raw file is never held in memory all at once. One of the two is
+    required.
+    """
     filename: str
-    content: bytes
+    content: Optional[bytes] = None
     content_type: str = "application/octet-stream"
+    content_stream: Optional[BinaryIO] = None
+    
+    def __post_init__(self):
+        if self.content is None and self.content_stream is None:
+            raise ValueError(f"Attachment {self.filename!r} requires content or content_stream")
+
+
+def _encode_attachment_stream(stream: BinaryIO) -> str:
+    """Base64-encode a binary stream chunk by chunk."""
+    encoded = []
+    carry = b""
+    while chunk := stream.read(_ATTACHMENT_CHUNK_SIZE):
+        # Raw, socket and pipe streams may return short reads; only encode
+        # whole 3-byte groups so no padding lands mid-output
+        if carry:
+            chunk = carry + chunk
+        cut = len(chunk) - len(chunk) % 3
+        encoded.append(base64.b64encode(chunk[:cut]).decode("ascii"))
+        carry = chunk[cut:]
+    encoded.append(base64.b64encode(carry).decode("ascii"))
+    return "".join(encoded)
+
+
+def _attachment_params(att: EmailAttachment) -> Dict[str, Any]:
+    """Build the Resend parameters for a single attachment."""
+    return {
+        "filename": att.filename,
+        "content": (
+            _encode_attachment_stream(att.content_stream)
+            if att.content_stream is not None
+            else att.content
+        ),
+        "content_type": att.content_type,
+    }
 
 @dataclass
 class EmailResult:
@@ -24,6 +256,91 @@ class EmailResult:
     message_id: Optional[str] = None
     error: Optional[str] = None
 
+# Interface for pluggable resend HTTP clients (older SDKs have none)
+_ResendHTTPClient: Any = getattr(resend, "HTTPClient", object)
+
+
+class _PooledHTTPClient(_ResendHTTPClient):
+    """
+    HTTP client for the resend SDK backed by a pooled requests.Session.
+    
+    Keeps TLS connections to the Resend API alive between sends instead of
+    opening a new connection per email. It replaces the SDK's client for the
+    whole process, so it implements the full resend.HTTPClient interface,
+    mirroring resend.RequestsClient.
+    """
+    
+    def __init__(self, timeout: int = _HTTP_TIMEOUT):
+        self._timeout = timeout
+        self._session = requests.Session()
+        # Retry only connection failures; POSTs are not retried after being sent
+        adapter = HTTPAdapter(
+            pool_connections=_HTTP_POOL_SIZE,
+            pool_maxsize=_HTTP_POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.2),
+        )
+        self._session.mount("https://", adapter)
+    
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json: Optional[Any] = None,
+        files: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, str]] = None,
+    ) -> Tuple[bytes, int, Mapping[str, str]]:
+        if files is not None:
+            # Multipart upload (e.g. contact imports); form fields go in data
+            response = self._session.request(
+                method=method,
+                url=url,
+                headers=headers,
+                files=files,
+                data=data,
+                timeout=self._timeout,
+            )
+            return response.content, response.status_code, response.headers
+        
+        body: Any = data
+        if data is not None:
+            json = None
+        elif orjson is not None and json is not None:
+            # orjson encodes large HTML/base64 payloads several times faster
+            try:
+                body = orjson.dumps(json)
+            except TypeError:
+                pass
+            else:
+                headers = {**headers, "Content-Type": "application/json"}
+                json = None
+        
+        response = self._session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            json=json,
+            data=body,
+            timeout=self._timeout,
+        )
+        return response.content, response.status_code, response.headers
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether a failed send may succeed on retry (rate limit, server or transport error)."""
+    if isinstance(error, requests.RequestException):
+        return True
+    # Covers ApplicationError, RateLimitError and the SDK's wrapped HTTP client errors
+    code = str(getattr(error, "code", ""))
+    return code == "429" or code.startswith("5")
+
+
+def _is_stock_http_client(client: Any) -> bool:
+    """Whether client is the resend SDK's own default RequestsClient."""
+    stock = getattr(resend, "RequestsClient", None)
+    return stock is not None and type(client) is stock
+
+
 class ResendService:
     """
     Resend email service for transactional emails.
@@ -35,6 +352,14 @@ class ResendService:
     - Email tracking
     """
     
+    # Process-wide resend SDK configuration, applied once rather than per instance
+    _configure_lock = threading.Lock()
+    _configured_api_key: Optional[str] = None
+    _http_client_installed = False
+    
+    # Background workers for queued magic-link sends, shared by all instances
+    _magic_link_queue = ThreadPoolExecutor(max_workers=4, thread_name_prefix="resend-magic-link")
+    
     def __init__(self, api_key: Optional[str] = None):
         """
         Initialize Resend service.
@@ -42,13 +367,32 @@ class ResendService:
         Args:
             api_key: Resend API key (defaults to RESEND_API_KEY env var)
         """
-        self.api_key = api_key or os.getenv('RESEND_API_KEY')
+        self.api_key = api_key or _RESEND_API_KEY
         if not self.api_key:
             raise ValueError("Resend API key is required")
         
-        resend.api_key = self.api_key
-        self.from_email = os.getenv('RESEND_FROM_EMAIL', 'admin@stablemischief.ai')
+        self._configure_resend(self.api_key)
+        self.from_email = _RESEND_FROM
+        self._default_params: Dict[str, Any] = {"from": self.from_email}
         
+    @classmethod
+    def _configure_resend(cls, api_key: str) -> None:
+        """Set the global resend API key and pooled HTTP client if not already set."""
+        if cls._configured_api_key == api_key and cls._http_client_installed:
+            return
+        with cls._configure_lock:
+            if cls._configured_api_key != api_key:
+                resend.api_key = api_key
+                cls._configured_api_key = api_key
+            # Only replace the SDK's stock client: older SDKs have no pluggable
+            # client, and one the application installed (proxy, custom TLS)
+            # must be kept
+            if not cls._http_client_installed and _is_stock_http_client(
+                getattr(resend, "default_http_client", None)
+            ):
+                resend.default_http_client = _PooledHTTPClient()
+            cls._http_client_installed = True
+    
     def send_email(
         self,
         to: str | List[str],
@@ -76,61 +420,99 @@ class ResendService:
         Returns:
             EmailResult with success status and message ID
         """
-        try:
-            # Ensure to is a list
-            if isinstance(to, str):
-                to = [to]
-            
-            # Build email params
-            params = {
-                "from": from_email or self.from_email,
-                "to": to,
-                "subject": subject,
-            }
-            
-            # Add content (must have either HTML or text)
-            if html:
-                params["html"] = html
-            if text:
-                params["text"] = text
-            if not html and not text:
-                return EmailResult(
-                    success=False,
-                    error="Either HTML or text content is required"
-                )
-            
-            # Add optional params
-            if reply_to:
-                params["reply_to"] = reply_to
-            if tags:
-                params["tags"] = tags
-                
-            # Add attachments
-            if attachments:
-                params["attachments"] = [
-                    {
-                        "filename": att.filename,
-                        "content": att.content,
-                        "content_type": att.content_type,
-                    }
-                    for att in attachments
-                ]
-            
-            # Send email
-            response = resend.Emails.send(params)
-            
+        # Must have either HTML or text content
+        if not html and not text:
             return EmailResult(
-                success=True,
-                message_id=response.get("id"),
+                success=False,
+                error="Either HTML or text content is required"
             )
+        
+        params = self._build_params(
+            to=to,
+            subject=subject,
+            html=html,
+            text=text,
+            from_email=from_email,
+            reply_to=reply_to,
+            attachments=attachments,
+            tags=tags,
+        )
+        return self._send_prebuilt(params)
+    
+    def _build_params(
+        self,
+        to: str | List[str],
+        subject: str,
+        html: Optional[str] = None,
+        text: Optional[str] = None,
+        from_email: Optional[str] = None,
+        reply_to: Optional[str] = None,
+        attachments: Optional[List[EmailAttachment]] = None,
+        tags: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """Build the Resend request parameters for a single email."""
+        # Ensure to is a list
+        if isinstance(to, str):
+            to = [to]
+        
+        params: Dict[str, Any] = {
+            "from": from_email or self.from_email,
+            "to": to,
+            "subject": subject,
+        }
+        
+        # Add content
+        if html:
+            params["html"] = html
+        if text:
+            params["text"] = text
+        
+        # Add optional params
+        if reply_to:
+            params["reply_to"] = reply_to
+        if tags:
+            params["tags"] = tags
             
-        except Exception as e:
-            logger.error(f"Failed to send email: {e}")
+        # Add attachments
+        if attachments:
+            params["attachments"] = [_attachment_params(att) for att in attachments]
+        
+        return params
+    
+    def _send_prebuilt(self, params: Dict[str, Any]) -> EmailResult:
+        """
+        Send a single email from final Resend parameters.
+        
+        Fast path for callers that build params themselves, skipping
+        send_email's validation and optional-field handling.
+        """
+        try:
+            return self._send_or_raise_auth(params)
+        except _AUTH_ERRORS as e:
+            logger.error("Failed to send email: %s", e)
             return EmailResult(
                 success=False,
                 error=str(e)
             )
     
+    def _send_or_raise_auth(self, params: Dict[str, Any]) -> EmailResult:
+        """Send a single email; authentication errors propagate to the caller."""
+        try:
+            response = resend.Emails.send(params)
+        except _AUTH_ERRORS:
+            raise
+        except _SEND_ERRORS as e:
+            logger.error("Failed to send email: %s", e)
+            return EmailResult(
+                success=False,
+                error=str(e)
+            )
+        
+        return EmailResult(
+            success=True,
+            message_id=response.get("id"),
+        )
+    
     def send_batch(
         self,
         emails: List[Dict[str, Any]]
@@ -138,18 +520,144 @@ class ResendService:
         """
         Send multiple emails in batch.
         
+        Emails are sent through Resend's batch endpoint in chunks of up to
+        100 per request. Emails with attachments (unsupported by the batch
+        endpoint) are sent individually, as is any chunk Resend rejects as
+        invalid, so one bad email does not fail the others. If a chunk fails
+        for any other reason (rate limit, server or transport error), its
+        emails are failed without retrying each one, as are any emails Resend
+        returns no id for. Identical emails (same recipients, sender, subject
+        and body) are sent once and the result is repeated for every copy. If
+        Resend rejects the API key, the remaining emails are failed without
+        further requests.
+        
         Args:
             emails: List of email parameters (same as send_email)
             
         Returns:
-            List of EmailResult objects
+            List of EmailResult objects, in the same order as emails
         """
-        results = []
-        for email_params in emails:
-            result = self.send_email(**email_params)
-            results.append(result)
+        results: List[Optional[EmailResult]] = [None] * len(emails)
+        individual = []
+        batchable = []
+        duplicates = []
+        seen: Dict[bytes, int] = {}
+        for index, email_params in enumerate(emails):
+            if not (email_params.get("html") or email_params.get("text")):
+                results[index] = EmailResult(
+                    success=False,
+                    error="Either HTML or text content is required"
+                )
+            elif email_params.get("attachments"):
+                individual.append((index, self._build_params(**email_params)))
+            else:
+                params = self._build_params(**email_params)
+                key = blake2b(repr(params).encode(), digest_size=16).digest()
+                if key in seen:
+                    duplicates.append((index, seen[key]))
+                else:
+                    seen[key] = index
+                    batchable.append((index, params))
+        
+        try:
+            for index, params in individual:
+                results[index] = self._send_or_raise_auth(params)
+            
+            pending = iter(batchable)
+            while chunk := list(islice(pending, _BATCH_SIZE)):
+                try:
+                    response = resend.Batch.send([params for _, params in chunk])
+                except _AUTH_ERRORS:
+                    raise
+                except _BATCH_VALIDATION_ERRORS as e:
+                    logger.warning("Batch rejected, sending %d emails individually: %s", len(chunk), e)
+                    for index, params in chunk:
+                        results[index] = self._send_or_raise_auth(params)
+                    continue
+                except _SEND_ERRORS as e:
+                    logger.error("Batch send failed for %d emails: %s", len(chunk), e)
+                    for index, _ in chunk:
+                        results[index] = EmailResult(
+                            success=False,
+                            error=str(e)
+                        )
+                    continue
+                
+                sent = response.get("data") or []
+                if len(sent) != len(chunk):
+                    logger.error("Batch response had %d results for %d emails", len(sent), len(chunk))
+                for position, (index, _) in enumerate(chunk):
+                    if position < len(sent):
+                        results[index] = EmailResult(
+                            success=True,
+                            message_id=sent[position].get("id"),
+                        )
+                    else:
+                        results[index] = EmailResult(
+                            success=False,
+                            error="No result returned by Resend batch send"
+                        )
+        except _AUTH_ERRORS as e:
+            logger.error("Resend authentication failed, skipping remaining emails: %s", e)
+            error = f"Authentication failed: {e}"
+            results = [
+                result or EmailResult(success=False, error=error)
+                for result in results
+            ]
+        
+        # Each copy gets its own result so callers can mutate them independently
+        for index, original in duplicates:
+            results[index] = replace(results[original])
+        
         return results
     
+    def send_batch_concurrent(
+        self,
+        emails: List[Dict[str, Any]],
+        max_concurrency: int = 16
+    ) -> List[EmailResult]:
+        """
+        Send multiple emails concurrently from a thread pool.
+        
+        Each email is an independent send_email call, so network round-trips
+        overlap instead of running back to back.
+        
+        Args:
+            emails: List of email parameters (same as send_email)
+            max_concurrency: Maximum number of in-flight requests
+            
+        Returns:
+            List of EmailResult objects, in the same order as emails
+        """
+        if not emails:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(emails))) as executor:
+            return list(executor.map(lambda params: self.send_email(**params), emails))
+    
+    async def send_batch_async(
+        self,
+        emails: List[Dict[str, Any]],
+        max_concurrency: int = 16
+    ) -> List[EmailResult]:
+        """
+        Send multiple emails concurrently without blocking the event loop.
+        
+        Args:
+            emails: List of email parameters (same as send_email)
+            max_concurrency: Maximum number of in-flight requests, to stay
+                within Resend's rate limits
+            
+        Returns:
+            List of EmailResult objects, in the same order as emails
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def send(params: Dict[str, Any]) -> EmailResult:
+            async with semaphore:
+                return await asyncio.to_thread(self.send_email, **params)
+        
+        return list(await asyncio.gather(*(send(params) for params in emails)))
+    
     def send_magic_link(
         self,
         to: str,
@@ -169,65 +677,85 @@ class ResendService:
         Returns:
             EmailResult
         """
-        subject = "Your secure login link"
-        
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .button {{ 
-                    display: inline-block;
-                    padding: 12px 24px;
-                    background-color: #3b82f6;
-                    color: white;
-                    text-decoration: none;
-                    border-radius: 6px;
-                    font-weight: 500;
-                }}
-                .footer {{ margin-top: 40px; color: #6b7280; font-size: 14px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h2>Hello {name}!</h2>
-                {"<p>Welcome to AIDEN from " + company + ".</p>" if company else "<p>Welcome to AIDEN.</p>"}
-                <p>Click the button below to securely log in to your account:</p>
-                <p style="margin: 30px 0;">
-                    <a href="{magic_link}" class="button">Log In to AIDEN</a>
-                </p>
-                <p>Or copy and paste this link in your browser:</p>
-                <p style="word-break: break-all; color: #3b82f6;">{magic_link}</p>
-                <div class="footer">
-                    <p>This link will expire in 15 minutes for security reasons.</p>
-                    <p>If you didn't request this email, you can safely ignore it.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        return self._send_prebuilt(
+            self._magic_link_params(to, name, magic_link, company)
+        )
+    
+    def _magic_link_params(
+        self,
+        to: str,
+        name: str,
+        magic_link: str,
+        company: Optional[str]
+    ) -> Dict[str, Any]:
+        """Build the Resend parameters for a magic link email."""
+        if company:
+            welcome_html = _WELCOME_HTML_WITH_COMPANY % escape(company)
+            welcome_text = _WELCOME_TEXT_WITH_COMPANY % company
+        else:
+            welcome_html = _WELCOME_HTML_NO_COMPANY
+            welcome_text = _WELCOME_TEXT_NO_COMPANY
         
-        text = f"""
-        Hello {name}!
+        safe_link = escape(magic_link, quote=True)
+        html = _MAGIC_LINK_HTML % (escape(name), welcome_html, safe_link, safe_link)
+        text = _MAGIC_LINK_TEXT % (name, welcome_text, magic_link)
         
-        {"Welcome to AIDEN from " + company + "." if company else "Welcome to AIDEN."}
+        return {
+            **self._default_params,
+            "to": [to],
+            "subject": _MAGIC_LINK_SUBJECT,
+            "html": html,
+            "text": text,
+            "tags": _MAGIC_LINK_TAGS,
+        }
+    
+    def queue_magic_link(
+        self,
+        to: str,
+        name: str,
+        magic_link: str,
+        company: Optional[str] = None
+    ) -> "Future[EmailResult]":
+        """
+        Queue a magic link email and return without waiting for Resend.
         
-        Click this link to securely log in to your account:
-        {magic_link}
+        Rate-limit, server and transport failures are retried up to three
+        times with exponential backoff; other errors fail immediately.
         
-        This link will expire in 15 minutes for security reasons.
-        If you didn't request this email, you can safely ignore it.
+        Args:
+            to: Recipient email
+            name: User's name
+            magic_link: The magic link URL
+            company: Optional company name
+            
+        Returns:
+            Future resolving to the EmailResult of the send
         """
-        
-        return self.send_email(
-            to=to,
-            subject=subject,
-            html=html,
-            text=text,
-            tags={"type": "magic_link", "app": "aiden"}
-        )
+        params = self._magic_link_params(to, name, magic_link, company)
+        return self._magic_link_queue.submit(self._send_with_retry, params)
+    
+    def _send_with_retry(self, params: Dict[str, Any]) -> EmailResult:
+        """Send a single email, retrying retryable failures with exponential backoff."""
+        delay = _QUEUE_RETRY_BACKOFF
+        for attempt in range(1, _QUEUE_MAX_ATTEMPTS + 1):
+            try:
+                response = resend.Emails.send(params)
+            except _SEND_ERRORS as e:
+                if _is_retryable(e) and attempt < _QUEUE_MAX_ATTEMPTS:
+                    logger.warning("Send attempt %d failed, retrying in %.1fs: %s", attempt, delay, e)
+                    time.sleep(delay)
+                    delay *= 2
+                    continue
+                logger.error("Failed to send email after %d attempts: %s", attempt, e)
+                return EmailResult(
+                    success=False,
+                    error=str(e)
+                )
+            
+            return EmailResult(
+                success=True,
+                message_id=response.get("id"),
+            )
     
     def send_completion_email(
         self,
@@ -252,78 +780,25 @@ class ResendService:
         """
         subject = f"Your {completion_type} Results"
         
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .button {{ 
-                    display: inline-block;
-                    padding: 12px 24px;
-                    background-color: #10b981;
-                    color: white;
-                    text-decoration: none;
-                    border-radius: 6px;
-                    font-weight: 500;
-                }}
-                .success-badge {{
-                    display: inline-block;
-                    padding: 4px 8px;
-                    background-color: #d1fae5;
-                    color: #065f46;
-                    border-radius: 4px;
-                    font-size: 12px;
-                    font-weight: 600;
-                }}
-                .footer {{ margin-top: 40px; color: #6b7280; font-size: 14px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h2>Congratulations, {name}! 🎉</h2>
-                <p>You've successfully completed your <span class="success-badge">{completion_type}</span></p>
-                
-                {"<p>Your personalized results are ready. Click the button below to view them:</p><p style='margin: 30px 0;'><a href='" + results_url + "' class='button'>View Your Results</a></p>" if results_url else "<p>Your results report is attached to this email.</p>"}
-                
-                <h3>What's Next?</h3>
-                <ul>
-                    <li>Review your personalized insights</li>
-                    <li>Share results with your team</li>
-                    <li>Schedule a follow-up consultation</li>
-                </ul>
-                
-                <div class="footer">
-                    <p>Thank you for using our platform. If you have any questions, please don't hesitate to reach out.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        text = f"""
-        Congratulations, {name}!
-        
-        You've successfully completed your {completion_type}.
-        
-        {"Your personalized results are ready. View them here: " + results_url if results_url else "Your results report is attached to this email."}
-        
-        What's Next?
-        - Review your personalized insights
-        - Share results with your team
-        - Schedule a follow-up consultation
+        if results_url:
+            results_html = _RESULTS_HTML_WITH_URL % escape(results_url, quote=True)
+            results_text = _RESULTS_TEXT_WITH_URL % results_url
+        else:
+            results_html = _RESULTS_HTML_ATTACHED
+            results_text = _RESULTS_TEXT_ATTACHED
         
-        Thank you for using our platform. If you have any questions, please don't hesitate to reach out.
-        """
+        html = _COMPLETION_HTML % (escape(name), escape(completion_type), results_html)
+        text = _COMPLETION_TEXT % (name, completion_type, results_text)
         
-        attachments = [attachment] if attachment else None
+        params = {
+            **self._default_params,
+            "to": [to],
+            "subject": subject,
+            "html": html,
+            "text": text,
+            "tags": {"type": "completion", "completion_type": completion_type},
+        }
+        if attachment:
+            params["attachments"] = [_attachment_params(attachment)]
         
-        return self.send_email(
-            to=to,
-            subject=subject,
-            html=html,
-            text=text,
-            attachments=attachments,
-            tags={"type": "completion", "completion_type": completion_type}
-        )
\ No newline at end of file
+        return self._send_prebuilt(params)
\ No newline at end of file
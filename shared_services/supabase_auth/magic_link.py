@@ -2,49 +2,162 @@
 Magic Link Authentication Service
 """
 import os
-from typing import Optional, Dict, Any
+import asyncio
+import atexit
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import fields
+from importlib.util import find_spec
+from typing import Optional, Dict, Any, Callable, TypeVar
 from datetime import datetime
+from functools import lru_cache, partial
 import logging
-from supabase import create_client, Client
+import httpx
+from supabase import create_client, Client, ClientOptions
+try:
+    from supabase_auth.errors import AuthRetryableError
+except ImportError:  # supabase-py releases that still bundle gotrue
+    from gotrue.errors import AuthRetryableError
+from .utils import split_name
 
 logger = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
+# Environment configuration, read once at import
+_SUPABASE_URL = os.getenv("SUPABASE_URL")
+_SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+_SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+_FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
+
+# Maximum Supabase auth requests in flight at once, across all event loops
+_SUPABASE_MAX_CONCURRENCY = 32
+_supabase_executor = ThreadPoolExecutor(
+    max_workers=_SUPABASE_MAX_CONCURRENCY,
+    thread_name_prefix="supabase-auth",
+)
+
+
+async def _run_blocking(func: Callable[..., _T], *args: Any) -> _T:
+    """Run a blocking Supabase call off the event loop, bounded by the shared pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_supabase_executor, partial(func, *args))
+
+
+# Dedicated queue for magic-link delivery so sends never hold up the caller
+_MAGIC_LINK_QUEUE_WORKERS = 4
+_MAGIC_LINK_MAX_ATTEMPTS = 3
+_MAGIC_LINK_RETRY_BACKOFF = 1.0  # seconds, doubled after each failed attempt
+# Network failures and gateway errors; API rejections (4xx) are never retried
+_MAGIC_LINK_RETRYABLE_ERRORS = (AuthRetryableError, httpx.TransportError)
+_magic_link_queue = ThreadPoolExecutor(
+    max_workers=_MAGIC_LINK_QUEUE_WORKERS,
+    thread_name_prefix="magic-link-queue",
+)
+
+
+def _send_magic_link_task(client: Client, payload: Dict[str, Any]) -> None:
+    """Send a queued magic link, retrying transport failures with exponential backoff."""
+    delay = _MAGIC_LINK_RETRY_BACKOFF
+    for attempt in range(1, _MAGIC_LINK_MAX_ATTEMPTS + 1):
+        try:
+            response = client.auth.sign_in_with_otp(payload)
+        except _MAGIC_LINK_RETRYABLE_ERRORS as e:
+            if attempt == _MAGIC_LINK_MAX_ATTEMPTS:
+                logger.error("Error sending queued magic link after %d attempts: %s", attempt, e)
+                return
+            logger.warning("Queued magic link attempt %d failed, retrying in %.1fs: %s", attempt, delay, e)
+            time.sleep(delay)
+            delay *= 2
+            continue
+        except Exception as e:
+            logger.error("Error sending queued magic link: %s", e)
+            return
+        
+        if hasattr(response, 'error') and response.error:
+            logger.error("Magic link error: %s", response.error)
+        return
+
+
+# Keep-alive pool shared by every Supabase client; HTTP/2 needs the optional h2 package
+_SUPABASE_HTTP_TIMEOUT = 10
+_SUPABASE_KEEPALIVE_EXPIRY = 60
+_SUPABASE_HTTP2 = find_spec("h2") is not None
+# Older supabase-py releases cannot take an injected httpx client
+_SUPPORTS_HTTPX_CLIENT = "httpx_client" in {f.name for f in fields(ClientOptions)}
+
+
+@lru_cache(maxsize=1)
+def _get_supabase_http_client() -> httpx.Client:
+    """Get the process-wide httpx client used for all Supabase requests."""
+    client = httpx.Client(
+        http2=_SUPABASE_HTTP2,
+        timeout=_SUPABASE_HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=_SUPABASE_MAX_CONCURRENCY,
+            max_keepalive_connections=_SUPABASE_MAX_CONCURRENCY,
+            keepalive_expiry=_SUPABASE_KEEPALIVE_EXPIRY,
+        ),
+    )
+    atexit.register(client.close)
+    return client
+
+
+def _create_supabase_client(url: str, key: str) -> Client:
+    """
+    Create a Supabase client on the shared HTTP connection pool.
+    
+    Clients are not shared: each one holds the auth session and headers of
+    the user it last verified, so only the underlying httpx pool is reused.
+    """
+    if not _SUPPORTS_HTTPX_CLIENT:
+        return create_client(url, key)
+    
+    options = ClientOptions(
+        postgrest_client_timeout=_SUPABASE_HTTP_TIMEOUT,
+        storage_client_timeout=_SUPABASE_HTTP_TIMEOUT,
+        httpx_client=_get_supabase_http_client(),
+    )
+    return create_client(url, key, options=options)
+
 
 class MagicLinkService:
     """Service for handling magic link authentication with Supabase."""
     
     def __init__(self):
         """Initialize Supabase client."""
-        self.supabase_url = os.getenv("SUPABASE_URL")
-        self.supabase_anon_key = os.getenv("SUPABASE_ANON_KEY")
-        self.supabase_service_key = os.getenv("SUPABASE_SERVICE_KEY")
+        self.supabase_url = _SUPABASE_URL
+        self.supabase_anon_key = _SUPABASE_ANON_KEY
+        self.supabase_service_key = _SUPABASE_SERVICE_KEY
         
         if not self.supabase_url or not self.supabase_anon_key:
             raise ValueError("Missing Supabase environment variables")
         
-        # Create Supabase client
-        self.client: Client = create_client(self.supabase_url, self.supabase_anon_key)
-        self.frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
+        # Reuse the shared Supabase client (and its connection pool)
+        self.client: Client = _create_supabase_client(self.supabase_url, self.supabase_anon_key)
+        self.frontend_url = _FRONTEND_URL
         self.redirect_url = f"{self.frontend_url}/auth/callback"
     
     async def send_magic_link(
         self, 
         email: str, 
         redirect_to: Optional[str] = None, 
-        full_name: Optional[str] = None
+        full_name: Optional[str] = None,
+        wait: bool = False
     ) -> Dict[str, Any]:
-        """Send a magic link to the user's email."""
+        """
+        Send a magic link to the user's email.
+        
+        By default the send is queued and this returns immediately with
+        ``{"success": True, "queued": True}``; delivery errors are logged by
+        the queue worker. Pass ``wait=True`` to send inline and get the
+        Supabase response (useful for debugging).
+        """
         try:
             # Parse full name
-            first_name = ""
-            last_name = ""
-            if full_name:
-                name_parts = full_name.strip().split(" ")
-                first_name = name_parts[0] if name_parts else ""
-                last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
+            first_name, last_name = split_name(full_name)
             
-            # Send magic link
-            response = self.client.auth.sign_in_with_otp({
+            payload = {
                 "email": email,
                 "options": {
                     "email_redirect_to": redirect_to or self.redirect_url,
@@ -56,10 +169,21 @@ class MagicLinkService:
                         "full_name": full_name
                     }
                 }
-            })
+            }
+            
+            if not wait:
+                _magic_link_queue.submit(_send_magic_link_task, self.client, payload)
+                return {
+                    "success": True,
+                    "queued": True,
+                    "message": "Magic link queued for delivery"
+                }
+            
+            # Send magic link
+            response = await _run_blocking(self.client.auth.sign_in_with_otp, payload)
             
             if hasattr(response, 'error') and response.error:
-                logger.error(f"Magic link error: {response.error}")
+                logger.error("Magic link error: %s", response.error)
                 return {"success": False, "error": response.error.message}
             
             return {
@@ -69,13 +193,26 @@ class MagicLinkService:
             }
             
         except Exception as e:
-            logger.error(f"Error sending magic link: {e}")
+            logger.error("Error sending magic link: %s", e)
             return {"success": False, "error": str(e)}
     
+    async def warm_up(self) -> None:
+        """
+        Open a connection to Supabase ahead of the first auth request.
+        
+        Intended for application startup so the first magic-link send or
+        verification does not pay for the TLS handshake. The request itself
+        is expected to be rejected; only the pooled connection is kept.
+        """
+        try:
+            await _run_blocking(self.client.auth.get_user, "warm-up")
+        except Exception:
+            pass
+    
     async def verify_magic_link(self, token: str, type: str = "magiclink") -> Dict[str, Any]:
         """Verify the magic link token."""
         try:
-            response = self.client.auth.verify_otp({
+            response = await _run_blocking(self.client.auth.verify_otp, {
                 "token_hash": token,
                 "type": type
             })
@@ -90,5 +227,5 @@ class MagicLinkService:
             }
             
         except Exception as e:
-            logger.error(f"Error verifying token: {e}")
+            logger.error("Error verifying token: %s", e)
             return {"success": False, "error": str(e)}
\ No newline at end of file
@@ -2,15 +2,64 @@
 Magic Link Authentication Service
 Ported from aiBA-1 magicLinkService.ts to Python
 """
-from typing import Optional, Dict, Any
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 import logging
-from ..core.supabase_config import supabase_auth, supabase_admin, MAGIC_LINK_REDIRECT
-from ..db.models import User
-from ..db.session import SessionLocal
+from .utils import split_name
+
+# Supabase clients, models and the DB engine are imported inside each function
+# so importing this module does not build them
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+    from ..db.models import User
 
 logger = logging.getLogger(__name__)
 
+# Session shared by profile helpers within the current request/task, if any
+_current_session: ContextVar[Optional[Session]] = ContextVar("_current_session", default=None)
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    Provide a database session scoped to the current context.
+    
+    Nested uses (e.g. several profile helpers called while a request holds
+    an outer session_scope) share one session instead of checking out a new
+    connection each time. Only the outermost scope commits, rolls back and
+    closes the session; a nested scope runs in a SAVEPOINT, so an error in
+    it undoes only its own changes and leaves the caller's pending work
+    alone. Code inside a scope should flush, never commit or roll back.
+    
+    Yields:
+        SQLAlchemy session
+    """
+    db = _current_session.get()
+    if db is not None:
+        with db.begin_nested():
+            yield db
+        return
+    
+    from ..db.session import SessionLocal
+    
+    db = SessionLocal()
+    # Objects handed back to callers must stay readable after the commit below
+    db.expire_on_commit = False
+    token = _current_session.set(db)
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        _current_session.reset(token)
+        db.close()
+
 
 async def send_magic_link(
     email: str, 
@@ -28,15 +77,11 @@ async def send_magic_link(
     Returns:
         Dict with success status and message
     """
+    from ..core.supabase_config import supabase_auth, MAGIC_LINK_REDIRECT
+    
     try:
         # Parse full name into first and last
-        first_name = ""
-        last_name = ""
-        if full_name:
-            name_parts = full_name.strip().split(" ")
-            first_name = name_parts[0] if name_parts else ""
-            # Everything after the first word becomes the last name
-            last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
+        first_name, last_name = split_name(full_name)
         
         # Send magic link via Supabase Auth
         # This will send "Confirm signup" email for new users,
@@ -56,7 +101,7 @@ async def send_magic_link(
         })
         
         if response.error:
-            logger.error(f"Magic link error: {response.error}")
+            logger.error("Magic link error: %s", response.error)
             return {
                 "success": False,
                 "error": response.error.message
@@ -69,7 +114,7 @@ async def send_magic_link(
         }
         
     except Exception as e:
-        logger.error(f"Unexpected error sending magic link: {e}")
+        logger.error("Unexpected error sending magic link: %s", e)
         return {
             "success": False,
             "error": "Failed to send magic link"
@@ -87,6 +132,8 @@ async def verify_magic_link(token: str, type: str = "magiclink") -> Dict[str, An
     Returns:
         Dict with success status, session, and user data
     """
+    from ..core.supabase_config import supabase_auth
+    
     try:
         response = supabase_auth.auth.verify_otp({
             "token_hash": token,
@@ -94,7 +141,7 @@ async def verify_magic_link(token: str, type: str = "magiclink") -> Dict[str, An
         })
         
         if response.error:
-            logger.error(f"Token verification error: {response.error}")
+            logger.error("Token verification error: %s", response.error)
             return {
                 "success": False,
                 "error": response.error.message
@@ -107,7 +154,7 @@ async def verify_magic_link(token: str, type: str = "magiclink") -> Dict[str, An
         }
         
     except Exception as e:
-        logger.error(f"Unexpected error verifying token: {e}")
+        logger.error("Unexpected error verifying token: %s", e)
         return {
             "success": False,
             "error": "Failed to verify token"
@@ -130,47 +177,44 @@ async def get_or_create_profile(
     Returns:
         Dict with success status and user profile
     """
-    db = SessionLocal()
+    from sqlalchemy import literal_column
+    from sqlalchemy.dialects.postgresql import insert
+    from ..db.models import User
+    
     try:
-        # Check if user exists in users table
-        existing_user = db.query(User).filter(User.auth_user_id == user_id).first()
-        
-        if existing_user:
+        with session_scope() as db:
+            # Single round-trip upsert: inserts new users, touches updated_at on
+            # repeat logins. xmax = 0 only for rows created by this statement.
+            now = datetime.utcnow()
+            stmt = (
+                insert(User)
+                .values(
+                    email=email,
+                    auth_user_id=user_id,
+                    first_name=metadata.get("first_name") if metadata else None,
+                    last_name=metadata.get("last_name") if metadata else None,
+                    created_at=now,
+                    updated_at=now
+                )
+                .on_conflict_do_update(
+                    index_elements=["auth_user_id"],
+                    set_={"updated_at": now}
+                )
+                .returning(User, literal_column("xmax = 0").label("is_new"))
+            )
+            profile, is_new = db.execute(stmt).one()
             return {
                 "success": True,
-                "profile": existing_user,
-                "is_new": False
+                "profile": profile,
+                "is_new": bool(is_new)
             }
-        
-        # Create new user if doesn't exist
-        new_user = User(
-            email=email,
-            auth_user_id=user_id,
-            first_name=metadata.get("first_name") if metadata else None,
-            last_name=metadata.get("last_name") if metadata else None,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
-        )
-        
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        
-        return {
-            "success": True,
-            "profile": new_user,
-            "is_new": True
-        }
-        
+            
     except Exception as e:
-        logger.error(f"Error managing user profile: {e}")
-        db.rollback()
+        logger.error("Error managing user profile: %s", e)
         return {
             "success": False,
             "error": "Failed to manage user profile"
         }
-    finally:
-        db.close()
 
 
 async def verify_token(token: str) -> Optional[Dict[str, Any]]:
@@ -183,17 +227,19 @@ async def verify_token(token: str) -> Optional[Dict[str, Any]]:
     Returns:
         User data if valid, None otherwise
     """
+    from ..core.supabase_config import supabase_auth
+    
     try:
         response = supabase_auth.auth.get_user(token)
         
         if response.error or not response.user:
-            logger.error(f"Token verification failed: {response.error}")
+            logger.error("Token verification failed: %s", response.error)
             return None
         
         return response.user
         
     except Exception as e:
-        logger.error(f"Error verifying token: {e}")
+        logger.error("Error verifying token: %s", e)
         return None
 
 
@@ -207,15 +253,15 @@ async def get_profile(user_id: str) -> Optional[User]:
     Returns:
         User profile if found, None otherwise
     """
-    db = SessionLocal()
+    from ..db.models import User
+    
     try:
-        user = db.query(User).filter(User.auth_user_id == user_id).first()
-        return user
+        with session_scope() as db:
+            user = db.query(User).filter(User.auth_user_id == user_id).first()
+            return user
     except Exception as e:
-        logger.error(f"Error fetching user: {e}")
+        logger.error("Error fetching user: %s", e)
         return None
-    finally:
-        db.close()
 
 
 async def update_profile(user_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
@@ -229,46 +275,43 @@ async def update_profile(user_id: str, updates: Dict[str, Any]) -> Dict[str, Any
     Returns:
         Dict with success status and updated profile
     """
-    db = SessionLocal()
+    from ..db.models import User
+    
     try:
-        user = db.query(User).filter(User.auth_user_id == user_id).first()
-        
-        if not user:
+        with session_scope() as db:
+            user = db.query(User).filter(User.auth_user_id == user_id).first()
+            
+            if not user:
+                return {
+                    "success": False,
+                    "error": "User not found"
+                }
+            
+            # Parse name into first_name and last_name if provided
+            if "name" in updates:
+                user.first_name, user.last_name = split_name(updates["name"])
+            
+            if "company" in updates:
+                # Note: The users table doesn't have a company field in the schema
+                # This would need to be added or handled differently
+                pass
+            
+            user.updated_at = datetime.utcnow()
+            
+            db.flush()
+            db.refresh(user)
+            
             return {
-                "success": False,
-                "error": "User not found"
+                "success": True,
+                "profile": user
             }
-        
-        # Parse name into first_name and last_name if provided
-        if "name" in updates:
-            name_parts = updates["name"].strip().split(" ")
-            user.first_name = name_parts[0] if name_parts else ""
-            user.last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
-        
-        if "company" in updates:
-            # Note: The users table doesn't have a company field in the schema
-            # This would need to be added or handled differently
-            pass
-        
-        user.updated_at = datetime.utcnow()
-        
-        db.commit()
-        db.refresh(user)
-        
-        return {
-            "success": True,
-            "profile": user
-        }
-        
+            
     except Exception as e:
-        logger.error(f"Error updating user: {e}")
-        db.rollback()
+        logger.error("Error updating user: %s", e)
         return {
             "success": False,
             "error": "Failed to update user"
         }
-    finally:
-        db.close()
 
 
 async def is_profile_complete(user_id: str) -> bool:
@@ -281,18 +324,18 @@ async def is_profile_complete(user_id: str) -> bool:
     Returns:
         True if profile is complete, False otherwise
     """
-    db = SessionLocal()
+    from ..db.models import User
+    
     try:
-        user = db.query(User).filter(User.auth_user_id == user_id).first()
-        
-        if not user:
-            return False
-        
-        # Profile is complete if they have first_name and email
-        return bool(user.first_name and user.email)
-        
+        with session_scope() as db:
+            user = db.query(User).filter(User.auth_user_id == user_id).first()
+            
+            if not user:
+                return False
+            
+            # Profile is complete if they have first_name and email
+            return bool(user.first_name and user.email)
+            
     except Exception as e:
-        logger.error(f"Error checking profile completion: {e}")
-        return False
-    finally:
-        db.close()
\ No newline at end of file
+        logger.error("Error checking profile completion: %s", e)
+        return False
\ No newline at end of file
@@ -0,0 +1,26 @@
+"""
+Helpers shared by the Supabase auth services
+"""
+from typing import Optional, Tuple
+
+
+def split_name(full_name: Optional[str]) -> Tuple[str, str]:
+    """
+    Split a full name into first and last name.
+    
+    The first whitespace-separated word is the first name; everything after
+    it becomes the last name. Runs of spaces or tabs between words are
+    treated as a single separator.
+    
+    Args:
+        full_name: User's full name (may be None or empty)
+    
+    Returns:
+        Tuple of (first_name, last_name), empty strings when absent
+    """
+    parts = (full_name or "").split(None, 1)
+    if not parts:
+        return "", ""
+    if len(parts) == 1:
+        return parts[0], ""
+    return parts[0], parts[1].rstrip()
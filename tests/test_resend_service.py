@@ -0,0 +1,116 @@
+"""Tests for ResendService.send_batch against a faked Resend SDK."""
+
+import pytest
+import resend
+from resend.exceptions import InvalidApiKeyError, RateLimitError, ValidationError
+
+from shared_services.email.resend_service import EmailAttachment, ResendService
+
+
+class FakeResend:
+    """Records batch and single sends; queued errors are raised in order."""
+
+    def __init__(self):
+        self.batches = []
+        self.singles = []
+        self.batch_errors = []
+        self.single_errors = []
+        self.batch_data_limit = None
+
+    def batch_send(self, params):
+        self.batches.append(params)
+        if self.batch_errors:
+            raise self.batch_errors.pop(0)
+        data = [{"id": f"batch-{len(self.batches)}-{i}"} for i in range(len(params))]
+        return {"data": data[:self.batch_data_limit]}
+
+    def email_send(self, params):
+        self.singles.append(params)
+        if self.single_errors:
+            raise self.single_errors.pop(0)
+        return {"id": f"single-{len(self.singles)}"}
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeResend()
+    monkeypatch.setattr(resend.Batch, "send", fake.batch_send)
+    monkeypatch.setattr(resend.Emails, "send", fake.email_send)
+    return fake
+
+
+@pytest.fixture
+def service():
+    return ResendService(api_key="re_test")
+
+
+def _email(n, **extra):
+    return {"to": f"user{n}@example.com", "subject": f"Hello {n}", "text": "Hi", **extra}
+
+
+def test_batches_are_chunked(fake, service):
+    results = service.send_batch([_email(n) for n in range(250)])
+
+    assert [len(batch) for batch in fake.batches] == [100, 100, 50]
+    assert all(result.success for result in results)
+    assert results[0].message_id == "batch-1-0"
+    assert results[249].message_id == "batch-3-49"
+
+
+def test_attachments_and_missing_content_are_split_out(fake, service):
+    attachment = EmailAttachment(filename="a.txt", content=b"data")
+    emails = [_email(0), _email(1, attachments=[attachment]), {"to": "x@example.com", "subject": "Empty"}]
+
+    results = service.send_batch(emails)
+
+    assert len(fake.batches) == 1 and len(fake.batches[0]) == 1
+    assert len(fake.singles) == 1 and fake.singles[0]["attachments"]
+    assert results[0].message_id == "batch-1-0"
+    assert results[1].message_id == "single-1"
+    assert not results[2].success
+
+
+def test_validation_error_falls_back_to_individual_sends(fake, service):
+    fake.batch_errors.append(ValidationError("bad email", "validation_error", 422))
+    fake.single_errors.append(ValidationError("bad email", "validation_error", 422))
+
+    results = service.send_batch([_email(n) for n in range(3)])
+
+    assert len(fake.singles) == 3
+    assert [result.success for result in results] == [False, True, True]
+
+
+def test_other_batch_errors_fail_the_chunk(fake, service):
+    fake.batch_errors.append(RateLimitError("slow down", "rate_limit_exceeded", 429))
+
+    results = service.send_batch([_email(n) for n in range(101)])
+
+    assert not fake.singles
+    assert [result.success for result in results] == [False] * 100 + [True]
+
+
+def test_short_batch_response_fails_unmatched_emails(fake, service):
+    fake.batch_data_limit = 1
+
+    results = service.send_batch([_email(n) for n in range(3)])
+
+    assert [result.success for result in results] == [True, False, False]
+    assert results[0].message_id == "batch-1-0"
+
+
+def test_duplicates_are_sent_once_with_independent_results(fake, service):
+    results = service.send_batch([_email(0), _email(1), _email(0)])
+
+    assert len(fake.batches[0]) == 2
+    assert results[2] == results[0]
+    assert results[2] is not results[0]
+
+
+def test_auth_error_skips_remaining_requests(fake, service):
+    fake.batch_errors.append(InvalidApiKeyError("bad key", "invalid_api_key", 403))
+
+    results = service.send_batch([_email(n) for n in range(150)])
+
+    assert len(fake.batches) == 1
+    assert all(not result.success for result in results)
+    assert results[0] is not results[1]